@@ -1,12 +1,19 @@
 import boto3
+from botocore.config import Config
 import os
-import json
 import csv
-import glob
+import functools
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from dotenv import load_dotenv
-from pypdf import PdfReader, PdfWriter
-from io import BytesIO, StringIO
+import orjson
+from io import StringIO
+import pdf_utils
+import textract_cache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,40 +25,80 @@ output_folder = "output"
 
 def find_pdf_files(folder_path):
     """Find all PDF files in the specified folder"""
-    pdf_pattern = os.path.join(folder_path, "*.pdf")
-    pdf_files = glob.glob(pdf_pattern)
+    if not os.path.isdir(folder_path):
+        return []
+    
+    with os.scandir(folder_path) as entries:
+        pdf_files = [
+            entry.path for entry in entries
+            if entry.is_file() and entry.name.lower().endswith('.pdf')
+        ]
     return pdf_files
 
-def get_text_from_block(blocks_dict, block_id):
-    """Extract text from a block by following CHILD relationships to WORD blocks"""
-    if block_id not in blocks_dict:
-        return ''
-    
-    block = blocks_dict[block_id]
-    text_parts = []
-    
-    # Check if it's a WORD block directly
-    if block.get('BlockType') == 'WORD':
-        return block.get('Text', '')
-    
-    # Follow CHILD relationships
-    for relationship in block.get('Relationships', []):
-        if relationship['Type'] == 'CHILD':
-            for child_id in relationship['Ids']:
-                child_text = get_text_from_block(blocks_dict, child_id)
-                if child_text:
-                    text_parts.append(child_text)
-    
-    return ' '.join(text_parts)
+def get_text_from_block(blocks_dict, block_id, text_cache=None):
+    """
+    Extract text from a block by following CHILD relationships to WORD blocks.
+    Walks the relationship graph with an explicit stack and memoizes the text of
+    every visited block in text_cache, so shared descendants are resolved once.
+    """
+    if text_cache is None:
+        text_cache = {}
+    
+    stack = [block_id]
+    in_progress = set()
+    
+    while stack:
+        current_id = stack[-1]
+        if current_id in text_cache:
+            stack.pop()
+            continue
+        
+        block = blocks_dict.get(current_id)
+        if block is None:
+            text_cache[current_id] = ''
+            stack.pop()
+            continue
+        
+        # WORD blocks carry the text directly
+        if block.get('BlockType') == 'WORD':
+            text_cache[current_id] = block.get('Text', '')
+            stack.pop()
+            continue
+        
+        # Follow CHILD relationships
+        child_ids = [
+            child_id
+            for relationship in block.get('Relationships', [])
+            if relationship['Type'] == 'CHILD'
+            for child_id in relationship['Ids']
+        ]
+        
+        # Resolve unvisited children first, then come back to this block
+        in_progress.add(current_id)
+        pending = [child_id for child_id in child_ids
+                   if child_id not in text_cache and child_id not in in_progress]
+        if pending:
+            stack.extend(reversed(pending))
+            continue
+        
+        text_parts = [text_cache.get(child_id, '') for child_id in child_ids]
+        text_cache[current_id] = ' '.join(part for part in text_parts if part)
+        in_progress.discard(current_id)
+        stack.pop()
+    
+    return text_cache[block_id]
 
-def extract_table_data(blocks, table_block):
+def extract_table_data(blocks_dict, table_block, text_cache=None):
     """
     Extract table data from Textract response following AWS documentation structure.
     Handles merged cells, table titles, footers, and column headers.
+    blocks_dict: All blocks of the page keyed by block Id
+    text_cache: Optional memo of block text, shared across the tables of a page
     Reference: https://docs.aws.amazon.com/textract/latest/dg/how-it-works-tables.html
     """
-    # Create a dictionary for quick block lookup
-    blocks_dict = {block['Id']: block for block in blocks}
+    # Memoized block text, shared by title, footer, merged and regular cells
+    if text_cache is None:
+        text_cache = {}
     
     # Extract table metadata
     entity_types = table_block.get('EntityTypes', [])
@@ -78,7 +125,7 @@ def extract_table_data(blocks, table_block):
     table_title = ''
     for title_id in title_ids:
         if title_id in blocks_dict:
-            title_text = get_text_from_block(blocks_dict, title_id)
+            title_text = get_text_from_block(blocks_dict, title_id, text_cache)
             if title_text:
                 table_title = title_text
                 break
@@ -87,7 +134,7 @@ def extract_table_data(blocks, table_block):
     table_footer = ''
     for footer_id in footer_ids:
         if footer_id in blocks_dict:
-            footer_text = get_text_from_block(blocks_dict, footer_id)
+            footer_text = get_text_from_block(blocks_dict, footer_id, text_cache)
             if footer_text:
                 table_footer = footer_text
                 break
@@ -103,7 +150,7 @@ def extract_table_data(blocks, table_block):
             col_span = merged_block.get('ColumnSpan', 1)
             
             # Extract text from merged cell
-            merged_text = get_text_from_block(blocks_dict, merged_cell_id)
+            merged_text = get_text_from_block(blocks_dict, merged_cell_id, text_cache)
             
             # Store merged cell info
             merged_cells_data[(row_index, col_index)] = {
@@ -112,9 +159,18 @@ def extract_table_data(blocks, table_block):
                 'col_span': col_span
             }
     
+    # Index every (row, col) position covered by a merged cell so each
+    # cell can look up its merged text in O(1); the first merge wins
+    covered = {}
+    for (m_row, m_col), merged_info in merged_cells_data.items():
+        for r in range(m_row, m_row + merged_info['row_span']):
+            for c in range(m_col, m_col + merged_info['col_span']):
+                covered.setdefault((r, c), merged_info['text'])
+    
     # Create a dictionary of cells by their row and column indices
     cells = {}
-    cell_metadata = {}
+    max_row = 0
+    max_col = 0
     
     for cell_id in cell_ids:
         if cell_id in blocks_dict:
@@ -122,33 +178,20 @@ def extract_table_data(blocks, table_block):
             if cell_block.get('BlockType') == 'CELL':
                 row_index = cell_block.get('RowIndex', 0)
                 col_index = cell_block.get('ColumnIndex', 0)
-                row_span = cell_block.get('RowSpan', 1)
-                col_span = cell_block.get('ColumnSpan', 1)
-                entity_types = cell_block.get('EntityTypes', [])
-                
-                # Check if this cell is part of a merged cell we already processed
-                # If so, use the merged cell text
-                merged_text = None
-                for (m_row, m_col), merged_info in merged_cells_data.items():
-                    if (m_row <= row_index < m_row + merged_info['row_span'] and
-                        m_col <= col_index < m_col + merged_info['col_span']):
-                        merged_text = merged_info['text']
-                        break
                 
-                if merged_text is not None:
-                    cell_text = merged_text
+                # If this cell is part of a merged cell, use the merged cell text
+                if (row_index, col_index) in covered:
+                    cell_text = covered[(row_index, col_index)]
                 else:
                     # Extract text from cell
-                    cell_text = get_text_from_block(blocks_dict, cell_id)
+                    cell_text = get_text_from_block(blocks_dict, cell_id, text_cache)
                 
                 cells[(row_index, col_index)] = cell_text
-                cell_metadata[(row_index, col_index)] = {
-                    'row_span': row_span,
-                    'col_span': col_span,
-                    'entity_types': entity_types
-                }
+                if row_index > max_row:
+                    max_row = row_index
+                if col_index > max_col:
+                    max_col = col_index
     
-    # Find max row and column indices
     if not cells:
         return {
             'table_data': [],
@@ -158,17 +201,11 @@ def extract_table_data(blocks, table_block):
             'metadata': {}
         }
     
-    max_row = max(row for row, col in cells.keys())
-    max_col = max(col for row, col in cells.keys())
-    
-    # Build table as list of rows
-    table_data = []
-    for row in range(1, max_row + 1):
-        row_data = []
-        for col in range(1, max_col + 1):
-            cell_text = cells.get((row, col), '')
-            row_data.append(cell_text)
-        table_data.append(row_data)
+    # Build table as list of rows, filling only the positions that have cells
+    table_data = [[''] * max_col for _ in range(max_row)]
+    for (row, col), cell_text in cells.items():
+        if row >= 1 and col >= 1:
+            table_data[row - 1][col - 1] = cell_text
     
     return {
         'table_data': table_data,
@@ -178,8 +215,7 @@ def extract_table_data(blocks, table_block):
         'metadata': {
             'rows': max_row,
             'columns': max_col,
-            'merged_cells': len(merged_cells_data),
-            'cell_metadata': cell_metadata
+            'merged_cells': len(merged_cells_data)
         }
     }
 
@@ -196,9 +232,7 @@ def format_table_as_csv(table_info, include_metadata=True):
         writer.writerow(['[TABLE_TITLE]', table_info['table_title']])
     
     # Write table data
-    table_data = table_info.get('table_data', [])
-    for row in table_data:
-        writer.writerow(row)
+    writer.writerows(table_info.get('table_data', []))
     
     # Add table footer as metadata row if present and requested
     if include_metadata and table_info.get('table_footer'):
@@ -213,131 +247,265 @@ def get_csv_filename(pdf_path, page_num, table_idx):
     Example: Perangkaan-Agromakanan-Malaysia-2024-ocr-page-17-table-1.csv
     """
     # Get base filename without extension
-    pdf_basename = os.path.splitext(os.path.basename(pdf_path))[0]
+    pdf_basename = Path(pdf_path).stem
     return f"{pdf_basename}-ocr-page-{page_num}-table-{table_idx}.csv"
 
-def combine_tables_to_csv(all_tables_data):
+def write_combined_csv(csv_path, all_tables_data):
     """
-    Combine all tables into a single CSV file.
+    Write all tables into a single CSV file.
     Clean format suitable for Excel - just titles and table data.
+    Rows are streamed straight to the file instead of building the CSV in memory.
     """
-    output = StringIO()
-    writer = csv.writer(output)
+    with open(csv_path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        
+        # Add timestamp at the top
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        writer.writerow(['Generated on', timestamp])
+        writer.writerow([])  # Empty row for spacing
+        
+        for table_info in all_tables_data:
+            table_title = table_info.get('title', '')
+            
+            # Add table title as a regular row (no prefix)
+            if table_title:
+                writer.writerow([table_title])
+            
+            # Write table data
+            writer.writerows(table_info['table_data'])
+            
+            # Add empty row between tables for spacing
+            writer.writerow([])
+
+def get_aws_config():
+    """
+    Build the botocore config used for the AWS clients.
+    Adaptive retries throttle requests client-side when Textract reports
+    rate limiting, and the connection pool is sized for concurrent page calls.
+    """
+    return Config(
+        retries={
+            'max_attempts': int(os.getenv("TEXTRACT_RETRIES", "10")),
+            'mode': 'adaptive'
+        },
+        max_pool_connections=int(os.getenv("TEXTRACT_POOL", "32")),
+        read_timeout=120,
+        connect_timeout=10
+    )
+
+@functools.lru_cache(maxsize=1)
+def get_aws_session():
+    """
+    Get the AWS session shared by all clients in this process.
+    Credentials come from boto3's default chain (environment/.env, profile or
+    instance role); the region defaults to us-east-1.
+    """
+    return boto3.Session(region_name=os.getenv("AWS_REGION", "us-east-1"))
+
+@functools.lru_cache(maxsize=1)
+def get_textract_client():
+    """Get the Textract client shared by all PDFs processed in this process"""
+    return get_aws_session().client('textract', config=get_aws_config())
+
+def analyze_document_async(textract_client, s3_client, pdf_path, bucket, log_print):
+    """
+    Run Textract table analysis on the whole PDF with the asynchronous API.
+    The PDF is uploaded to S3 once, Textract processes all pages server-side,
+    and the paginated results are collected into a single list of blocks.
+    Returns a dict mapping page number to that page's blocks.
+    """
+    prefix = os.getenv("TEXTRACT_S3_PREFIX", "textract-input/")
+    poll_interval = float(os.getenv("TEXTRACT_POLL_INTERVAL", "5"))
+    s3_key = f"{prefix}{os.path.basename(pdf_path)}"
     
-    # Add timestamp at the top
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    writer.writerow(['Generated on', timestamp])
-    writer.writerow([])  # Empty row for spacing
+    log_print(f"Uploading {pdf_path} to s3://{bucket}/{s3_key}...")
+    s3_client.upload_file(pdf_path, bucket, s3_key)
     
-    for table_info in all_tables_data:
-        table_title = table_info.get('title', '')
-        table_data = table_info['table_data']
+    try:
+        job = textract_client.start_document_analysis(
+            DocumentLocation={
+                'S3Object': {
+                    'Bucket': bucket,
+                    'Name': s3_key
+                }
+            },
+            FeatureTypes=['TABLES']
+        )
+        job_id = job['JobId']
+        log_print(f"Started Textract job: {job_id}")
         
-        # Add table title as a regular row (no prefix)
-        if table_title:
-            writer.writerow([table_title])
+        # Wait for the job to finish
+        while True:
+            response = textract_client.get_document_analysis(JobId=job_id)
+            job_status = response.get('JobStatus')
+            if job_status != 'IN_PROGRESS':
+                break
+            time.sleep(poll_interval)
         
-        # Write table data
-        for row in table_data:
-            writer.writerow(row)
+        if job_status not in ('SUCCEEDED', 'PARTIAL_SUCCESS'):
+            raise RuntimeError(
+                f"Textract job {job_id} finished with status {job_status}: "
+                f"{response.get('StatusMessage', 'no status message')}"
+            )
+        if job_status == 'PARTIAL_SUCCESS':
+            log_print(f"Warning: Textract job {job_id} only partially succeeded")
         
-        # Add empty row between tables for spacing
-        writer.writerow([])
+        # Collect all result pages
+        blocks = list(response.get('Blocks', []))
+        next_token = response.get('NextToken')
+        while next_token:
+            response = textract_client.get_document_analysis(JobId=job_id, NextToken=next_token)
+            blocks.extend(response.get('Blocks', []))
+            next_token = response.get('NextToken')
+    finally:
+        s3_client.delete_object(Bucket=bucket, Key=s3_key)
     
-    return output.getvalue()
+    log_print(f"Textract job {job_id} returned {len(blocks)} blocks")
+    
+    # Group blocks by the page they belong to
+    blocks_by_page = {}
+    for block in blocks:
+        blocks_by_page.setdefault(block.get('Page', 1), []).append(block)
+    return blocks_by_page
 
-def process_pdf(pdf_path, log_print):
+def process_pdf(pdf_path, log_print, log_file=None, textract_client=None):
     """
     Process a single PDF file and extract tables from all pages.
     Returns tuple: (success, all_tables_data, all_tables_summary)
     log_print: Function to use for logging (prints to both console and file)
+    log_file: Open log file; full Textract responses are streamed into it
+    when TEXTRACT_DEBUG is set
+    textract_client: Optional Textract client, defaults to get_textract_client()
     """
+    debug_responses = bool(os.getenv("TEXTRACT_DEBUG")) and log_file is not None
     
     try:
-        # Get AWS credentials from environment variables
-        aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID", "")
-        aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY", "")
-        aws_region = os.getenv("AWS_REGION", "us-east-1")  # Default to us-east-1
-        
-        if not aws_access_key_id or not aws_secret_access_key:
-            log_print("Error: AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY environment variables must be set")
+        if get_aws_session().get_credentials() is None:
+            log_print("Error: AWS credentials not found. Set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY or configure an AWS profile/role")
             return False, [], []
         
-        # Initialize Textract client
-        textract_client = boto3.client(
-            'textract',
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            region_name=aws_region
-        )
+        # Reuse the shared Textract client unless one was passed in
+        if textract_client is None:
+            textract_client = get_textract_client()
         
         # Read PDF to get total pages
-        reader = PdfReader(pdf_path)
-        total_pages = len(reader.pages)
+        source_pdf = pdf_utils.open_pdf(pdf_path)
+        total_pages = len(source_pdf.pages)
+        
+        # Optional S3 bucket for the asynchronous whole-document API; only
+        # worth the upload when there is more than one page to split
+        s3_bucket = os.getenv("TEXTRACT_S3_BUCKET", "") if total_pages > 1 else ""
         
         # Process all pages from 1 to total_pages
         start_page = 1
         end_page = total_pages
         
+        # Number of pages sent to Textract concurrently
+        max_workers = int(os.getenv("TEXTRACT_WORKERS", "8"))
+        
+        # Number of rows of each table echoed to the log
+        preview_rows = int(os.getenv("LOG_TABLE_PREVIEW", "20"))
+        
         log_print(f"Processing all pages: {start_page} to {end_page} (total: {total_pages} pages)")
+        if s3_bucket:
+            log_print(f"Using asynchronous Textract analysis via S3 bucket: {s3_bucket}")
+        else:
+            log_print(f"Concurrent Textract workers: {max_workers}")
         log_print("="*60)
         
-        pages_processed = 0
-        all_tables_data = []  # Store all table data for combined CSV
-        all_tables_summary = []  # Track all extracted tables for summary
+        # pikepdf documents are not thread-safe, so page splitting is serialized
+        source_lock = threading.Lock()
         
-        # Process each page
-        for page_num in range(start_page, end_page + 1):
-            log_print(f"\n{'='*60}")
-            log_print(f"Processing Page {page_num}...")
-            log_print(f"{'='*60}")
+        def _process_one_page(page_num, page_blocks=None):
+            """
+            Extract a single page, send it to Textract and parse its tables.
+            If page_blocks is given (asynchronous analysis), the Textract call is
+            skipped and those blocks are parsed directly.
+            Runs in a worker thread; log lines are collected and returned so that
+            each page's output stays together in the log.
+            """
+            page_log = []
+            
+            def page_print(*args):
+                page_log.append(' '.join(str(arg) for arg in args))
+            
+            result = {
+                'page': page_num,
+                'success': False,
+                'log': page_log,
+                'tables_data': [],
+                'tables_summary': []
+            }
+            
+            page_print(f"\n{'='*60}")
+            page_print(f"Processing Page {page_num}...")
+            page_print(f"{'='*60}")
             
             try:
-                # Extract page from PDF (0-indexed, so page_num - 1)
-                writer = PdfWriter()
-                writer.add_page(reader.pages[page_num - 1])
-                
-                # Write to bytes buffer
-                buffer = BytesIO()
-                writer.write(buffer)
-                buffer.seek(0)
-                
-                # Get PDF bytes for Textract
-                pdf_bytes = buffer.getvalue()
-                
-                log_print(f"Calling AWS Textract API for page {page_num}...")
-                log_print(f"  PDF size: {len(pdf_bytes)} bytes")
-                
-                # Call Textract analyze_document API with TABLES feature
-                # This is optimized for extracting table structures
-                response = textract_client.analyze_document(
-                    Document={
-                        'Bytes': pdf_bytes
-                    },
-                    FeatureTypes=['TABLES']
-                )
+                if page_blocks is not None:
+                    # Blocks already returned by the asynchronous job
+                    response = {'Blocks': page_blocks}
+                else:
+                    if total_pages == 1:
+                        # A single-page PDF can be sent to Textract as-is
+                        with open(pdf_path, 'rb') as pdf_file:
+                            pdf_bytes = pdf_file.read()
+                    else:
+                        # Extract page from PDF (0-indexed, so page_num - 1)
+                        with source_lock:
+                            pdf_bytes = pdf_utils.extract_page_bytes(source_pdf, page_num - 1)
+                    
+                    # Reuse a previous Textract response for identical page bytes
+                    cache_key = textract_cache.make_key(pdf_bytes, ['TABLES'])
+                    response = textract_cache.get(cache_key)
+                    
+                    if response is not None:
+                        page_print(f"Using cached Textract response for page {page_num} ({cache_key[:12]})")
+                    else:
+                        page_print(f"Calling AWS Textract API for page {page_num}...")
+                        page_print(f"  PDF size: {len(pdf_bytes)} bytes")
+                        
+                        # Call Textract analyze_document API with TABLES feature
+                        # This is optimized for extracting table structures
+                        response = textract_client.analyze_document(
+                            Document={
+                                'Bytes': pdf_bytes
+                            },
+                            FeatureTypes=['TABLES']
+                        )
+                        
+                        # Cache writes are best effort and never fail the page
+                        try:
+                            textract_cache.put(cache_key, response)
+                        except OSError as cache_error:
+                            page_print(f"  Warning: Could not cache Textract response: {cache_error}")
                 
-                log_print(f"\n=== Table OCR Output for Page {page_num} ===")
+                page_print(f"\n=== Table OCR Output for Page {page_num} ===")
                 
                 blocks = response.get('Blocks', [])
                 
+                # Index blocks by Id and by type in a single pass
+                blocks_dict = {}
+                blocks_by_type = defaultdict(list)
+                for block in blocks:
+                    blocks_dict[block['Id']] = block
+                    blocks_by_type[block.get('BlockType', 'UNKNOWN')].append(block)
+                text_cache = {}
+                
                 # Find all table blocks
-                table_blocks = [block for block in blocks if block.get('BlockType') == 'TABLE']
+                table_blocks = blocks_by_type['TABLE']
                 
-                log_print(f"\n--- Tables Found: {len(table_blocks)} ---")
+                page_print(f"\n--- Tables Found: {len(table_blocks)} ---")
                 
                 if not table_blocks:
-                    log_print("No tables detected on this page.")
-                    # Print full response for debugging
-                    log_print("\n--- Full Textract Response ---")
-                    log_print(json.dumps(response, indent=2, default=str))
+                    page_print("No tables detected on this page.")
                 else:
                     # Process each table
                     for table_idx, table_block in enumerate(table_blocks, 1):
-                        log_print(f"\n--- Table {table_idx} ---")
+                        page_print(f"\n--- Table {table_idx} ---")
                         
                         # Extract table data with full metadata
-                        table_info = extract_table_data(blocks, table_block)
+                        table_info = extract_table_data(blocks_dict, table_block, text_cache)
                         table_data = table_info.get('table_data', [])
                         
                         if table_data:
@@ -347,23 +515,25 @@ def process_pdf(pdf_path, log_print):
                             table_footer = table_info.get('table_footer', '')
                             
                             # Print table information
-                            log_print(f"  Table Type: {table_type}")
+                            page_print(f"  Table Type: {table_type}")
                             if table_title:
-                                log_print(f"  Table Title: {table_title}")
+                                page_print(f"  Table Title: {table_title}")
                             if table_footer:
-                                log_print(f"  Table Footer: {table_footer}")
-                            log_print(f"  Dimensions: {metadata.get('rows', len(table_data))} rows × {metadata.get('columns', len(table_data[0]) if table_data else 0)} columns")
+                                page_print(f"  Table Footer: {table_footer}")
+                            page_print(f"  Dimensions: {metadata.get('rows', len(table_data))} rows × {metadata.get('columns', len(table_data[0]) if table_data else 0)} columns")
                             if metadata.get('merged_cells', 0) > 0:
-                                log_print(f"  Merged Cells: {metadata['merged_cells']}")
+                                page_print(f"  Merged Cells: {metadata['merged_cells']}")
                             
-                            # Print table as formatted text
-                            log_print("\n  --- Table Content ---")
-                            for row_idx, row in enumerate(table_data, 1):
+                            # Print the first rows of the table as formatted text
+                            page_print("\n  --- Table Content ---")
+                            for row_idx, row in enumerate(table_data[:preview_rows], 1):
                                 row_str = " | ".join(str(cell) if cell else "" for cell in row)
-                                log_print(f"  Row {row_idx}: {row_str}")
+                                page_print(f"  Row {row_idx}: {row_str}")
+                            if len(table_data) > preview_rows:
+                                page_print(f"  ... ({len(table_data) - preview_rows} more rows)")
                             
                             # Store table data for combined CSV
-                            all_tables_data.append({
+                            result['tables_data'].append({
                                 'page': page_num,
                                 'table_index': table_idx,
                                 'type': table_type,
@@ -373,7 +543,7 @@ def process_pdf(pdf_path, log_print):
                             })
                             
                             # Add to summary
-                            all_tables_summary.append({
+                            result['tables_summary'].append({
                                 'page': page_num,
                                 'table_index': table_idx,
                                 'table_name': table_title if table_title else f'Table {table_idx} (Page {page_num})',
@@ -383,32 +553,75 @@ def process_pdf(pdf_path, log_print):
                                 'merged_cells': metadata.get('merged_cells', 0)
                             })
                             
-                            log_print(f"\n  ✓ Table extracted and will be included in combined CSV")
+                            page_print(f"\n  ✓ Table extracted and will be included in combined CSV")
                         else:
-                            log_print("  Warning: Could not extract table data")
-                            log_print(f"  Table block ID: {table_block.get('Id', 'N/A')}")
-                            log_print(f"  Confidence: {table_block.get('Confidence', 'N/A')}")
+                            page_print("  Warning: Could not extract table data")
+                            page_print(f"  Table block ID: {table_block.get('Id', 'N/A')}")
+                            page_print(f"  Confidence: {table_block.get('Confidence', 'N/A')}")
                 
                 # Also log block details for debugging
-                log_print(f"\n--- Block Statistics ---")
-                block_types = {}
-                for block in blocks:
-                    block_type = block.get('BlockType', 'UNKNOWN')
-                    block_types[block_type] = block_types.get(block_type, 0) + 1
-                for block_type, count in block_types.items():
-                    log_print(f"  {block_type}: {count}")
+                page_print(f"\n--- Block Statistics ---")
+                for block_type, type_blocks in blocks_by_type.items():
+                    if type_blocks:
+                        page_print(f"  {block_type}: {len(type_blocks)}")
                 
-                # Print full response for debugging (can be commented out if too verbose)
-                log_print("\n--- Full Textract Response (JSON) ---")
-                log_print(json.dumps(response, indent=2, default=str))
+                # Keep the full response for the debug dump in the log file
+                if debug_responses:
+                    result['response'] = response
                 
-                pages_processed += 1
+                result['success'] = True
                 
             except Exception as page_error:
-                log_print(f"Error processing page {page_num}: {page_error}")
+                page_print(f"Error processing page {page_num}: {page_error}")
                 import traceback
-                log_print(traceback.format_exc())
-                continue
+                page_print(traceback.format_exc())
+            
+            return result
+        
+        def _log_page_result(page_result):
+            """Write a finished page's log lines, plus its raw response in debug mode"""
+            log_print('\n'.join(page_result['log']))
+            if page_result.get('response') is not None:
+                # Written to the file only; too large to mirror to the console
+                log_file.write("\n--- Full Textract Response (JSON) ---\n")
+                response_json = orjson.dumps(page_result.pop('response'), option=orjson.OPT_INDENT_2, default=str)
+                log_file.write(response_json.decode('utf-8'))
+                log_file.write("\n")
+            if log_file is not None:
+                log_file.flush()
+        
+        page_results = [None] * (end_page - start_page + 1)
+        if s3_bucket:
+            # Analyze the whole document in one asynchronous job, then parse
+            # each page's blocks locally
+            s3_client = get_aws_session().client('s3', config=get_aws_config())
+            blocks_by_page = analyze_document_async(textract_client, s3_client, pdf_path, s3_bucket, log_print)
+            for page_num in range(start_page, end_page + 1):
+                page_result = _process_one_page(page_num, blocks_by_page.get(page_num, []))
+                _log_page_result(page_result)
+                page_results[page_num - start_page] = page_result
+        else:
+            # Submit all pages, then log and collect results in page order so
+            # the log never runs ahead of an earlier page
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(_process_one_page, page_num)
+                    for page_num in range(start_page, end_page + 1)
+                ]
+                for index, future in enumerate(futures):
+                    page_result = future.result()
+                    _log_page_result(page_result)
+                    page_results[index] = page_result
+        
+        pages_processed = 0
+        all_tables_data = []  # Store all table data for combined CSV
+        all_tables_summary = []  # Track all extracted tables for summary
+        
+        for page_result in page_results:
+            if page_result['success']:
+                pages_processed += 1
+            all_tables_data.extend(page_result['tables_data'])
+            all_tables_summary.extend(page_result['tables_summary'])
         
         log_print(f"\n{'='*60}")
         log_print(f"Processing Complete!")
@@ -423,6 +636,73 @@ def process_pdf(pdf_path, log_print):
         log_print(traceback.format_exc())
         return False, [], []
 
+def handle_pdf(pdf_path):
+    """
+    Process one PDF end to end: set up its log file, extract tables and write CSVs.
+    Runs in a worker process, so logging is set up here rather than passed in.
+    """
+    pdf_basename = Path(pdf_path).stem
+    
+    # Setup logging to timestamped log file based on PDF filename
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    log_filename = f"{pdf_basename}_log_{timestamp}.txt"
+    # Large buffer; the log is flushed once per page instead of once per line
+    log_file = open(log_filename, 'w', encoding='utf-8', buffering=1 << 16)
+    
+    # Serialize console/log output across Textract worker threads
+    log_lock = threading.Lock()
+    
+    def log_print(*args, **kwargs):
+        """Print to both console and log file"""
+        message = ' '.join(str(arg) for arg in args)
+        with log_lock:
+            print(*args, **kwargs)
+            log_file.write(message + '\n')
+    
+    log_print(f"\n{'='*80}")
+    log_print(f"Processing PDF: {pdf_path}")
+    log_print(f"Log file: {log_filename}")
+    log_print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    log_print(f"{'='*80}")
+    
+    # Process the PDF
+    success, all_tables_data, all_tables_summary = process_pdf(pdf_path, log_print, log_file)
+    
+    if success:
+        log_print(f"\n{'='*80}")
+        log_print(f"Processing Complete for {pdf_basename}!")
+        log_print(f"Total tables extracted: {len(all_tables_data)}")
+        log_print(f"Log file saved: {log_filename}")
+        
+        # Create single combined CSV file with all tables
+        if all_tables_data:
+            timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+            combined_filename = os.path.join(output_folder, f"{pdf_basename}_{timestamp_str}.csv")
+            write_combined_csv(combined_filename, all_tables_data)
+            log_print(f"✓ Single CSV file saved: {combined_filename}")
+        
+        # Create summary CSV file listing all table names
+        if all_tables_summary:
+            timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+            summary_filename = os.path.join(output_folder, f"{pdf_basename}_summary_{timestamp_str}.csv")
+            with open(summary_filename, 'w', encoding='utf-8', newline='') as summary_file:
+                writer = csv.DictWriter(summary_file, fieldnames=[
+                    'page', 'table_index', 'table_name', 'type', 
+                    'rows', 'columns', 'merged_cells'
+                ])
+                writer.writeheader()
+                writer.writerows(all_tables_summary)
+            log_print(f"✓ Summary CSV saved: {summary_filename}")
+        
+        log_print(f"{'='*80}\n")
+    else:
+        log_print(f"\n{'='*80}")
+        log_print(f"Failed to process {pdf_basename}")
+        log_print(f"{'='*80}\n")
+    
+    # Close log file
+    log_file.close()
+
 # Main execution
 if __name__ == "__main__":
     # Create output folder if it doesn't exist
@@ -437,68 +717,8 @@ if __name__ == "__main__":
     
     print(f"Found {len(pdf_files)} PDF file(s) in '{pdf_folder}' folder")
     
-    # Process each PDF file
-    for pdf_path in pdf_files:
-        pdf_basename = os.path.splitext(os.path.basename(pdf_path))[0]
-        
-        # Setup logging to timestamped log file based on PDF filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_filename = f"{pdf_basename}_log_{timestamp}.txt"
-        log_file = open(log_filename, 'w', encoding='utf-8')
-        
-        # Save original print function
-        _original_print = print
-        
-        def log_print(*args, **kwargs):
-            """Print to both console and log file"""
-            _original_print(*args, **kwargs)
-            message = ' '.join(str(arg) for arg in args)
-            log_file.write(message + '\n')
-            log_file.flush()
-        
-        log_print(f"\n{'='*80}")
-        log_print(f"Processing PDF: {pdf_path}")
-        log_print(f"Log file: {log_filename}")
-        log_print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        log_print(f"{'='*80}")
-        
-        # Process the PDF
-        success, all_tables_data, all_tables_summary = process_pdf(pdf_path, log_print)
-        
-        if success:
-            log_print(f"\n{'='*80}")
-            log_print(f"Processing Complete for {pdf_basename}!")
-            log_print(f"Total tables extracted: {len(all_tables_data)}")
-            log_print(f"Log file saved: {log_filename}")
-            
-            # Create single combined CSV file with all tables
-            if all_tables_data:
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                combined_filename = os.path.join(output_folder, f"{pdf_basename}_{timestamp_str}.csv")
-                combined_csv = combine_tables_to_csv(all_tables_data)
-                with open(combined_filename, 'w', encoding='utf-8', newline='') as combined_file:
-                    combined_file.write(combined_csv)
-                log_print(f"✓ Single CSV file saved: {combined_filename}")
-            
-            # Create summary CSV file listing all table names
-            if all_tables_summary:
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                summary_filename = os.path.join(output_folder, f"{pdf_basename}_summary_{timestamp_str}.csv")
-                with open(summary_filename, 'w', encoding='utf-8', newline='') as summary_file:
-                    writer = csv.DictWriter(summary_file, fieldnames=[
-                        'page', 'table_index', 'table_name', 'type', 
-                        'rows', 'columns', 'merged_cells'
-                    ])
-                    writer.writeheader()
-                    writer.writerows(all_tables_summary)
-                log_print(f"✓ Summary CSV saved: {summary_filename}")
-            
-            log_print(f"{'='*80}\n")
-        else:
-            log_print(f"\n{'='*80}")
-            log_print(f"Failed to process {pdf_basename}")
-            log_print(f"{'='*80}\n")
-        
-        # Close log file
-        log_file.close()
-
+    # Process PDF files in parallel, one worker process per PDF
+    max_pdf_workers = int(os.getenv("PDF_WORKERS", str(min(os.cpu_count() or 1, 4))))
+    max_pdf_workers = max(1, min(max_pdf_workers, len(pdf_files)))
+    with ProcessPoolExecutor(max_workers=max_pdf_workers) as executor:
+        list(executor.map(handle_pdf, pdf_files))
@@ -0,0 +1,40 @@
+import functools
+from io import BytesIO
+
+import pikepdf
+
+# Text-showing operators, XObject (image/form) draws and inline images.
+# pikepdf needs all of BI/ID/EI listed to parse an inline image, otherwise
+# it stops returning operators at the BI
+_CONTENT_OPERATORS = "Tj TJ ' \" Do BI ID EI"
+
+@functools.lru_cache(maxsize=8)
+def open_pdf(pdf_path):
+    """
+    Open a PDF once and reuse it for later calls with the same path.
+    The returned document is shared, so callers must not close it and must
+    serialize access to it across threads.
+    The file is memory-mapped so only the pages that are read get paged in;
+    it must not be modified while it is open.
+    """
+    return pikepdf.open(pdf_path, access_mode=pikepdf.AccessMode.mmap)
+
+def extract_page_bytes(pdf, page_index):
+    """
+    Copy a single page (0-indexed) into a new PDF and return its bytes.
+    Used to send one page at a time to the OCR APIs.
+    The same page always produces the same bytes, so they can be used as a cache key.
+    """
+    with pikepdf.new() as page_pdf:
+        page_pdf.pages.append(pdf.pages[page_index])
+        buffer = BytesIO()
+        page_pdf.save(buffer, deterministic_id=True)
+    return buffer.getvalue()
+
+def page_has_content(pdf, page_index):
+    """
+    Check whether a page (0-indexed) draws any text or images.
+    Pages that draw neither are blank and cannot contain a table.
+    """
+    page = pdf.pages[page_index]
+    return bool(pikepdf.parse_content_stream(page, _CONTENT_OPERATORS))
@@ -1,11 +1,16 @@
 import boto3
+from botocore.config import Config
 import os
+import sys
 import json
 import csv
 from datetime import datetime
 from dotenv import load_dotenv
-from pypdf import PdfReader, PdfWriter
-from io import BytesIO, StringIO
+from io import StringIO
+
+# Allow importing shared helpers from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pdf_utils
 
 # Load environment variables from .env file
 load_dotenv()
@@ -281,12 +286,21 @@ try:
         'textract',
         aws_access_key_id=aws_access_key_id,
         aws_secret_access_key=aws_secret_access_key,
-        region_name=aws_region
+        region_name=aws_region,
+        config=Config(
+            retries={
+                'max_attempts': int(os.getenv("TEXTRACT_RETRIES", "10")),
+                'mode': 'adaptive'
+            },
+            max_pool_connections=int(os.getenv("TEXTRACT_POOL", "32")),
+            read_timeout=120,
+            connect_timeout=10
+        )
     )
     
     # Read PDF
-    reader = PdfReader(pdf_path)
-    total_pages = len(reader.pages)
+    source_pdf = pdf_utils.open_pdf(pdf_path)
+    total_pages = len(source_pdf.pages)
     
     if total_pages < start_page:
         log_print(f"Error: PDF only has {total_pages} page(s). Page {start_page} does not exist.")
@@ -314,16 +328,7 @@ try:
         
         try:
             # Extract page from PDF (0-indexed, so page_num - 1)
-            writer = PdfWriter()
-            writer.add_page(reader.pages[page_num - 1])
-            
-            # Write to bytes buffer
-            buffer = BytesIO()
-            writer.write(buffer)
-            buffer.seek(0)
-            
-            # Get PDF bytes for Textract
-            pdf_bytes = buffer.getvalue()
+            pdf_bytes = pdf_utils.extract_page_bytes(source_pdf, page_num - 1)
             
             log_print(f"Calling AWS Textract API for page {page_num}...")
             log_print(f"  PDF size: {len(pdf_bytes)} bytes")
@@ -349,8 +354,9 @@ try:
             if not table_blocks:
                 log_print("No tables detected on this page.")
                 # Print full response for debugging
-                log_print("\n--- Full Textract Response ---")
-                log_print(json.dumps(response, indent=2, default=str))
+                log_print("\n--- Full Textract Response (written to log file) ---")
+                json.dump(response, log_file, indent=2, default=str)
+                log_file.write('\n')
             else:
                 # Process each table
                 for table_idx, table_block in enumerate(table_blocks, 1):
@@ -419,8 +425,9 @@ try:
                 log_print(f"  {block_type}: {count}")
             
             # Print full response for debugging (can be commented out if too verbose)
-            log_print("\n--- Full Textract Response (JSON) ---")
-            log_print(json.dumps(response, indent=2, default=str))
+            log_print("\n--- Full Textract Response (JSON, written to log file) ---")
+            json.dump(response, log_file, indent=2, default=str)
+            log_file.write('\n')
             
             pages_processed += 1
             
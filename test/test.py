@@ -1,15 +1,40 @@
 from mistralai import Mistral
+from mistralai.models import MistralError, OCRResponse
+from mistralai.utils import BackoffStrategy, RetryConfig
+import asyncio
 import os
 import base64
 import csv
+import hashlib
+import httpx
+import io
 import json
 import re
 import sys
+import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
-from pypdf import PdfReader, PdfWriter
-from io import BytesIO
+
+# Allow importing shared helpers from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pdf_utils
+
+# Markdown table separator row, e.g. | --- | :-: |
+_SEP_RE = re.compile(r'\|(?:[ :|-]*\|)?')
+
+# LaTeX and HTML cleanup patterns used by clean_latex_math
+_LATEX_EMPTY_SUP_RE = re.compile(r'\$\s*\{\s*\}\s*\^\{\d+\}\s*\$')
+_LATEX_EMPTY_MATH_RE = re.compile(r'\$\s*\{\s*\}\s*\$')
+_LATEX_MATH_RE = re.compile(r'\$([^$]*)\$')
+_MATHBF_RE = re.compile(r'\\mathbf\{([^}]*)\}')
+_LATEX_CMD_ARG_RE = re.compile(r'\\[a-zA-Z]+\{([^}]*)\}')
+_LATEX_CMD_RE = re.compile(r'\\[a-zA-Z]+')
+_EMPTY_SUP_RE = re.compile(r'\{\s*\}\s*\^\{\d+\}')
+_SUP_RE = re.compile(r'\^\{\d+\}')
+_EMPTY_BRACES_RE = re.compile(r'\{\s*\}')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_SPACED_DIGITS_RE = re.compile(r'\d(?:\s+\d)+')
+_WS_RE = re.compile(r'\s+')
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,10 +45,29 @@ pdf_path = "pdf/Perangkaan-Agromakanan-Malaysia-2024.pdf"
 # Page range to process (17 to 30 inclusive)
 start_page = 17
 end_page = 30
+# Seconds allowed for each OCR API attempt (retries get their own timeout)
 timeout = 30
+# Maximum number of pages sent to the OCR API at the same time
+max_concurrent_ocr = 10
+# Submit all pages as one Mistral batch job instead of individual OCR calls
+use_batch_api = False
+# Seconds between batch job status checks
+batch_poll_interval = 10
+# Backoff for retrying failed API calls, in milliseconds
+retry_initial_interval_ms = 1000
+retry_max_interval_ms = 30000
+retry_max_elapsed_ms = 300000
+# Skip pages that draw no text or images instead of sending them to the OCR API
+skip_blank_pages = True
+# Folder for cached OCR responses, keyed by page content (set to None to disable)
+ocr_cache_dir = ".ocr_cache"
+# Log per-page details and the full OCR response (set DEBUG_OCR=1)
+debug_ocr = bool(os.getenv("DEBUG_OCR"))
 
 # CSV filename
 csv_filename = "ocr_output_pages_17-30.csv"
+# Flush the CSV to disk after this many pages so partial results survive a crash
+csv_flush_every = 5
 
 # Setup logging to timestamped log file
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -57,8 +101,8 @@ if not api_key:
     exit(1)
 
 try:
-    reader = PdfReader(pdf_path)
-    total_pages = len(reader.pages)
+    source_pdf = pdf_utils.open_pdf(pdf_path)
+    total_pages = len(source_pdf.pages)
     
     if total_pages < start_page:
         print(f"Error: PDF only has {total_pages} page(s). Page {start_page} does not exist.")
@@ -71,10 +115,23 @@ try:
     
     print(f"Processing pages {start_page} to {end_page}...")
     
-    client = Mistral(api_key=api_key)
+    # Retry rate-limited, server-error and connection failures with exponential backoff
+    client = Mistral(
+        api_key=api_key,
+        retry_config=RetryConfig(
+            "backoff",
+            BackoffStrategy(
+                initial_interval=retry_initial_interval_ms,
+                max_interval=retry_max_interval_ms,
+                exponent=2.0,
+                max_elapsed_time=retry_max_elapsed_ms,
+            ),
+            retry_connection_errors=True,
+        ),
+    )
     
-    # Open CSV file for writing (will overwrite if exists)
-    csvfile = open(csv_filename, 'w', newline='', encoding='utf-8')
+    # Open CSV file for writing (will overwrite if exists), with a 1 MB buffer
+    csvfile = open(csv_filename, 'w', newline='', encoding='utf-8', buffering=1 << 20)
     writer = csv.writer(csvfile)
     
     pages_processed = 0
@@ -87,37 +144,37 @@ try:
         
         # Remove LaTeX math delimiters ($ ... $) - handle empty math blocks first
         # Remove patterns like ${ }^{1}$ or ${ }^{2}$ etc.
-        cell_value = re.sub(r'\$\s*\{\s*\}\s*\^\{\d+\}\s*\$', '', cell_value)
-        cell_value = re.sub(r'\$\s*\{\s*\}\s*\$', '', cell_value)
+        cell_value = _LATEX_EMPTY_SUP_RE.sub('', cell_value)
+        cell_value = _LATEX_EMPTY_MATH_RE.sub('', cell_value)
         
         # Remove LaTeX math delimiters ($ ... $) - general pattern
-        cell_value = re.sub(r'\$([^$]*)\$', r'\1', cell_value)
+        cell_value = _LATEX_MATH_RE.sub(r'\1', cell_value)
         
         # Remove \mathbf{...} and other LaTeX commands
-        cell_value = re.sub(r'\\mathbf\{([^}]*)\}', r'\1', cell_value)
-        cell_value = re.sub(r'\\[a-zA-Z]+\{([^}]*)\}', r'\1', cell_value)
-        cell_value = re.sub(r'\\[a-zA-Z]+', '', cell_value)
+        cell_value = _MATHBF_RE.sub(r'\1', cell_value)
+        cell_value = _LATEX_CMD_ARG_RE.sub(r'\1', cell_value)
+        cell_value = _LATEX_CMD_RE.sub('', cell_value)
         
         # Remove remaining LaTeX patterns like { }^{1} or ^{1} (without $ delimiters)
-        cell_value = re.sub(r'\{\s*\}\s*\^\{\d+\}', '', cell_value)
-        cell_value = re.sub(r'\^\{\d+\}', '', cell_value)
-        cell_value = re.sub(r'\{\s*\}', '', cell_value)
+        cell_value = _EMPTY_SUP_RE.sub('', cell_value)
+        cell_value = _SUP_RE.sub('', cell_value)
+        cell_value = _EMPTY_BRACES_RE.sub('', cell_value)
         
         # Remove HTML tags like <br>
-        cell_value = re.sub(r'<[^>]+>', ' ', cell_value)
+        cell_value = _HTML_TAG_RE.sub(' ', cell_value)
         
         # Clean up spaces between digits (e.g., "2 0 2 0" -> "2020")
         # But preserve spaces in text
         def fix_spaced_digits(match):
             digits = match.group(0)
             # Remove spaces between digits
-            return re.sub(r'\s+', '', digits)
+            return _WS_RE.sub('', digits)
         
         # Match sequences of digits with spaces between them
-        cell_value = re.sub(r'\d(?:\s+\d)+', fix_spaced_digits, cell_value)
+        cell_value = _SPACED_DIGITS_RE.sub(fix_spaced_digits, cell_value)
         
         # Clean up multiple spaces
-        cell_value = re.sub(r'\s+', ' ', cell_value)
+        cell_value = _WS_RE.sub(' ', cell_value)
         
         # Strip whitespace
         cell_value = cell_value.strip()
@@ -244,159 +301,248 @@ try:
     
     def parse_markdown_table(markdown_text):
         """Parse markdown table and return list of rows, handling multi-line cells"""
-        lines = markdown_text.split('\n')
         rows = []
-        current_row_parts = []
+        # Text of the row being collected; multi-line cells are joined with spaces
+        row_buffer = io.StringIO()
         
-        for line in lines:
+        def flush_row():
+            """Parse the buffered row text and append the parsed cells to rows"""
+            row_text = row_buffer.getvalue().strip()
+            row_buffer.seek(0)
+            row_buffer.truncate(0)
+            if not (row_text.startswith('|') and row_text.endswith('|')):
+                return
+            cells = [cell.strip() for cell in row_text[1:-1].split('|')]
+            if cells and not cells[0]:
+                cells = cells[1:]
+            if cells and not cells[-1]:
+                cells = cells[:-1]
+            if cells:
+                rows.append(cells)
+        
+        for line in markdown_text.split('\n'):
             line_stripped = line.strip()
             
             # Check if this line starts with |
             if line_stripped.startswith('|'):
-                # Check if this is a separator line (e.g., | --- | --- |)
-                if line_stripped.endswith('|') and all(c in '| -:' for c in line_stripped.replace(' ', '')):
-                    # Skip separator lines, but finish current row if any
-                    if current_row_parts:
-                        # Join and parse the row
-                        row_text = ' '.join(current_row_parts).strip()
-                        if row_text.startswith('|') and row_text.endswith('|'):
-                            cells = [cell.strip() for cell in row_text[1:-1].split('|')]
-                            if cells and not cells[0]:
-                                cells = cells[1:]
-                            if cells and not cells[-1]:
-                                cells = cells[:-1]
-                            if cells:
-                                rows.append(cells)
-                        current_row_parts = []
+                # Skip separator lines (e.g., | --- | --- |), but finish current row if any
+                if _SEP_RE.fullmatch(line_stripped):
+                    if row_buffer.tell():
+                        flush_row()
                     continue
                 
-                # If we have accumulated row parts and this line starts with |, finish previous row
-                if current_row_parts and line_stripped.startswith('|'):
-                    row_text = ' '.join(current_row_parts).strip()
-                    if row_text.startswith('|') and row_text.endswith('|'):
-                        cells = [cell.strip() for cell in row_text[1:-1].split('|')]
-                        if cells and not cells[0]:
-                            cells = cells[1:]
-                        if cells and not cells[-1]:
-                            cells = cells[:-1]
-                        if cells:
-                            rows.append(cells)
-                    current_row_parts = []
+                # If a row is already being collected, this line starts a new row
+                if row_buffer.tell():
+                    flush_row()
                 
                 # Add this line to current row
-                current_row_parts.append(line_stripped)
+                row_buffer.write(line_stripped)
+                row_buffer.write(' ')
                 
                 # If this line ends with |, we have a complete row
                 if line_stripped.endswith('|'):
-                    row_text = ' '.join(current_row_parts).strip()
-                    cells = [cell.strip() for cell in row_text[1:-1].split('|')]
-                    if cells and not cells[0]:
-                        cells = cells[1:]
-                    if cells and not cells[-1]:
-                        cells = cells[:-1]
-                    if cells:
-                        rows.append(cells)
-                    current_row_parts = []
-            elif current_row_parts:
+                    flush_row()
+            elif row_buffer.tell():
                 # This is a continuation line (part of a multi-line cell)
-                current_row_parts.append(line_stripped)
+                row_buffer.write(line_stripped)
+                row_buffer.write(' ')
                 # Check if this continuation line ends with |, meaning the row is complete
                 if line_stripped.endswith('|'):
-                    row_text = ' '.join(current_row_parts).strip()
-                    if row_text.startswith('|') and row_text.endswith('|'):
-                        cells = [cell.strip() for cell in row_text[1:-1].split('|')]
-                        if cells and not cells[0]:
-                            cells = cells[1:]
-                        if cells and not cells[-1]:
-                            cells = cells[:-1]
-                        if cells:
-                            rows.append(cells)
-                    current_row_parts = []
+                    flush_row()
         
         # Handle any remaining row
-        if current_row_parts:
-            row_text = ' '.join(current_row_parts).strip()
-            if row_text.startswith('|') and row_text.endswith('|'):
-                cells = [cell.strip() for cell in row_text[1:-1].split('|')]
-                if cells and not cells[0]:
-                    cells = cells[1:]
-                if cells and not cells[-1]:
-                    cells = cells[:-1]
-                if cells:
-                    rows.append(cells)
+        if row_buffer.tell():
+            flush_row()
         
         return rows
     
     def extract_tables_from_ocr_response(ocr_response, page_num):
         """Extract markdown tables from OCR response"""
-        markdown_tables = []
-        
-        # Check if ocr_response has pages attribute
-        if hasattr(ocr_response, 'pages'):
-            for page in ocr_response.pages:
-                if hasattr(page, 'markdown') and page.markdown:
-                    markdown_tables.append(page.markdown)
-        elif hasattr(ocr_response, '__dict__'):
-            ocr_dict = ocr_response.__dict__
-            if 'pages' in ocr_dict:
-                for page in ocr_dict['pages']:
-                    if hasattr(page, 'markdown') and page.markdown:
-                        markdown_tables.append(page.markdown)
-                    elif isinstance(page, dict) and 'markdown' in page:
-                        markdown_tables.append(page['markdown'])
-        elif isinstance(ocr_response, dict):
-            if 'pages' in ocr_response:
-                for page in ocr_response['pages']:
-                    if isinstance(page, dict) and 'markdown' in page:
-                        markdown_tables.append(page['markdown'])
-                    elif hasattr(page, 'markdown'):
-                        markdown_tables.append(page.markdown)
-        
-        return markdown_tables
+        # Every OCR path returns an OCRResponse model, so read its pages directly
+        return [page.markdown for page in ocr_response.pages if page.markdown]
     
-    # Process each page
-    for page_num in range(start_page, end_page + 1):
-        print(f"\n{'='*60}")
-        print(f"Processing Page {page_num}...")
-        print(f"{'='*60}")
-        
+    def get_ocr_cache_path(pdf_bytes):
+        """Get the cache file path for a page, keyed by a hash of its PDF bytes"""
+        key = hashlib.sha256(pdf_bytes).hexdigest()
+        return os.path.join(ocr_cache_dir, f"{key}.json")
+    
+    def load_cached_ocr(pdf_bytes):
+        """Load a cached OCR response for a page, or None if it is not cached"""
+        if not ocr_cache_dir:
+            return None
+        cache_path = get_ocr_cache_path(pdf_bytes)
+        if not os.path.exists(cache_path):
+            return None
         try:
+            with open(cache_path, 'r', encoding='utf-8') as cache_file:
+                return OCRResponse.model_validate_json(cache_file.read())
+        except (OSError, ValueError):
+            return None
+    
+    def save_cached_ocr(pdf_bytes, ocr_response):
+        """Store an OCR response in the cache; failures are logged but never raised"""
+        if not ocr_cache_dir:
+            return
+        try:
+            os.makedirs(ocr_cache_dir, exist_ok=True)
+            cache_path = get_ocr_cache_path(pdf_bytes)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                cache_file.write(ocr_response.model_dump_json())
+            os.replace(tmp_path, cache_path)
+        except OSError as cache_error:
+            print(f"  Warning: could not cache OCR response: {cache_error}")
+    
+    async def ocr_page(page_num, semaphore):
+        """Upload a single page and run OCR on it, limited by the shared semaphore"""
+        async with semaphore:
             # Extract page from PDF (0-indexed, so page_num - 1)
-            pdf_writer = PdfWriter()
-            pdf_writer.add_page(reader.pages[page_num - 1])
-            
-            # Write to bytes buffer
-            buffer = BytesIO()
-            pdf_writer.write(buffer)
-            buffer.seek(0)
+            pdf_bytes = pdf_utils.extract_page_bytes(source_pdf, page_num - 1)
             
-            # Convert PDF page to base64
-            pdf_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+            # Reuse the response from an earlier run if this page is unchanged
+            cached_response = load_cached_ocr(pdf_bytes)
+            if cached_response is not None:
+                return cached_response
             
-            # Process with Mistral OCR
-            print(f"Calling OCR API for page {page_num}...")
-            print(f"  Request details:")
-            print(f"    Model: mistral-ocr-latest")
-            print(f"    Document type: document_url")
-            print(f"    PDF size: {len(pdf_base64)} base64 characters")
-            print(f"    Timeout: {timeout} seconds")
-            
-            # Wrap OCR call with timeout
-            def call_ocr_api():
-                return client.ocr.process(
+            # Upload the raw page bytes and let the OCR API fetch them through
+            # a signed URL instead of inlining a base64 data URL
+            uploaded_file = await client.files.upload_async(
+                file={
+                    "file_name": f"page-{page_num}.pdf",
+                    "content": pdf_bytes,
+                },
+                purpose="ocr",
+            )
+            try:
+                signed_url = await client.files.get_signed_url_async(file_id=uploaded_file.id)
+                # The timeout bounds each attempt, so retry backoff is not cut short
+                ocr_response = await client.ocr.process_async(
                     model="mistral-ocr-latest",
                     document={
                         "type": "document_url",
-                        "document_url": f"data:application/pdf;base64,{pdf_base64}",
+                        "document_url": signed_url.url,
                     },
+                    timeout_ms=timeout * 1000,
                 )
+            finally:
+                # The uploaded page is only needed for this OCR call
+                await client.files.delete_async(file_id=uploaded_file.id)
             
-            try:
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(call_ocr_api)
-                    ocr_response = future.result(timeout=timeout)
-            except FuturesTimeoutError:
-                print(f"\n  ERROR: OCR API call timed out after {timeout} seconds")
+            save_cached_ocr(pdf_bytes, ocr_response)
+            return ocr_response
+    
+    async def ocr_all_pages(page_nums):
+        """Run OCR on all pages concurrently; results (or exceptions) are returned in page order"""
+        semaphore = asyncio.Semaphore(max_concurrent_ocr)
+        return await asyncio.gather(
+            *[ocr_page(page_num, semaphore) for page_num in page_nums],
+            return_exceptions=True,
+        )
+    
+    def ocr_all_pages_batch(page_nums):
+        """
+        Run OCR on all pages with a single Mistral batch job.
+        Results (or exceptions) are returned in page order.
+        """
+        if not page_nums:
+            return []
+        
+        # One OCR request per page, keyed by page number
+        batch_lines = []
+        for page_num in page_nums:
+            pdf_bytes = pdf_utils.extract_page_bytes(source_pdf, page_num - 1)
+            pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
+            batch_lines.append(json.dumps({
+                "custom_id": str(page_num),
+                "body": {
+                    "document": {
+                        "type": "document_url",
+                        "document_url": f"data:application/pdf;base64,{pdf_base64}",
+                    },
+                },
+            }))
+        
+        batch_file = client.files.upload(
+            file={
+                "file_name": "ocr_batch.jsonl",
+                "content": '\n'.join(batch_lines).encode('utf-8'),
+            },
+            purpose="batch",
+        )
+        try:
+            job = client.batch.jobs.create(
+                input_files=[batch_file.id],
+                model="mistral-ocr-latest",
+                endpoint="/v1/ocr",
+            )
+            print(f"    Batch job ID: {job.id}")
+            
+            # Wait for the job to finish
+            while job.status in ("QUEUED", "RUNNING"):
+                time.sleep(batch_poll_interval)
+                job = client.batch.jobs.get(job_id=job.id)
+        finally:
+            # The uploaded input file is only needed while the job runs
+            client.files.delete(file_id=batch_file.id)
+        
+        if job.status != "SUCCESS" or not job.output_file:
+            raise RuntimeError(f"OCR batch job {job.id} finished with status {job.status}")
+        
+        # Each output line holds the OCR response for one page
+        results = {}
+        output = client.files.download(file_id=job.output_file)
+        for line in output.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            page_num = int(result['custom_id'])
+            response = result.get('response') or {}
+            if response.get('status_code') == 200:
+                results[page_num] = OCRResponse.model_validate(response['body'])
+            else:
+                results[page_num] = RuntimeError(f"Batch OCR failed: {result.get('error') or response}")
+        
+        return [results.get(page_num, RuntimeError("No batch OCR result returned")) for page_num in page_nums]
+    
+    page_nums = list(range(start_page, end_page + 1))
+    
+    # Blank pages cannot contain tables, so they are not sent to the OCR API
+    blank_pages = set()
+    if skip_blank_pages:
+        blank_pages = {page_num for page_num in page_nums if not pdf_utils.page_has_content(source_pdf, page_num - 1)}
+        if blank_pages:
+            print(f"Skipping {len(blank_pages)} blank page(s): {', '.join(str(page_num) for page_num in sorted(blank_pages))}")
+    ocr_page_nums = [page_num for page_num in page_nums if page_num not in blank_pages]
+    
+    # Process with Mistral OCR
+    print(f"Calling OCR API for {len(ocr_page_nums)} pages...")
+    print(f"  Request details:")
+    print(f"    Model: mistral-ocr-latest")
+    print(f"    Document type: document_url")
+    if use_batch_api:
+        print(f"    Mode: batch job")
+        ocr_results = ocr_all_pages_batch(ocr_page_nums)
+    else:
+        print(f"    Concurrent requests: {max_concurrent_ocr}")
+        print(f"    Timeout: {timeout} seconds per attempt")
+        ocr_results = asyncio.run(ocr_all_pages(ocr_page_nums))
+    ocr_results_by_page = dict(zip(ocr_page_nums, ocr_results))
+    
+    # Process each page
+    for page_count, page_num in enumerate(page_nums, 1):
+        print(f"\n{'='*60}")
+        print(f"Processing Page {page_num}...")
+        print(f"{'='*60}")
+        
+        try:
+            if page_num in blank_pages:
+                print(f"  Page is blank, OCR skipped")
+                pages_processed += 1
+                continue
+            
+            ocr_result = ocr_results_by_page[page_num]
+            if isinstance(ocr_result, httpx.TimeoutException):
+                print(f"\n  ERROR: OCR API call timed out ({timeout} seconds per attempt)")
                 print(f"  This page likely contains an image that's difficult to interpret")
                 print(f"  Skipping page {page_num}...")
                 # Add error marker to CSV
@@ -405,40 +551,28 @@ try:
                 writer.writerow([f"ERROR: OCR timeout ({timeout}s) - page skipped due to difficult image"])
                 writer.writerow([])
                 continue
+            if isinstance(ocr_result, Exception):
+                raise ocr_result
+            ocr_response = ocr_result
             
             # Log OCR response
             print(f"\n  OCR Response received:")
-            print(f"    Response type: {type(ocr_response)}")
-            if hasattr(ocr_response, 'model'):
-                print(f"    Model used: {ocr_response.model}")
-            if hasattr(ocr_response, 'usage_info'):
-                print(f"    Usage info: {ocr_response.usage_info}")
-            if hasattr(ocr_response, 'pages'):
-                print(f"    Number of pages in response: {len(ocr_response.pages)}")
+            print(f"    Model used: {ocr_response.model}")
+            print(f"    Usage info: {ocr_response.usage_info}")
+            print(f"    Number of pages in response: {len(ocr_response.pages)}")
+            if debug_ocr:
+                print(f"    Response type: {type(ocr_response)}")
                 for idx, page in enumerate(ocr_response.pages):
                     print(f"    Page {idx}:")
-                    if hasattr(page, 'index'):
-                        print(f"      Index: {page.index}")
-                    if hasattr(page, 'markdown'):
-                        markdown_len = len(page.markdown) if page.markdown else 0
-                        print(f"      Markdown length: {markdown_len} characters")
-                        if page.markdown:
-                            # Log preview in console
-                            preview = page.markdown[:500].replace('\n', '\\n')
-                            print(f"      Markdown preview: {preview}...")
-                            # Write full markdown to log file
-                            log_file.write(f"\n      Full Markdown Content:\n")
-                            log_file.write(f"      {'='*60}\n")
-                            log_file.write(page.markdown)
-                            log_file.write(f"\n      {'='*60}\n")
-                            log_file.flush()
-                    if hasattr(page, 'dimensions'):
-                        print(f"      Dimensions: {page.dimensions}")
-            
-            # Log full response as string (for debugging)
-            print(f"\n  Full OCR Response (string representation):")
-            print(f"    {str(ocr_response)}")
-            print(f"    {'-'*60}")
+                    print(f"      Index: {page.index}")
+                    markdown_len = len(page.markdown) if page.markdown else 0
+                    print(f"      Markdown length: {markdown_len} characters")
+                    print(f"      Dimensions: {page.dimensions}")
+                
+                # Log full response as string (for debugging)
+                print(f"\n  Full OCR Response (string representation):")
+                print(f"    {str(ocr_response)}")
+                print(f"    {'-'*60}")
             
             # Extract markdown tables from response
             markdown_tables = extract_tables_from_ocr_response(ocr_response, page_num)
@@ -451,10 +585,7 @@ try:
                 preview = markdown_content[:300].replace(chr(10), '\\n').replace(chr(13), '')
                 print(f"      Preview (first 300 chars): {preview}...")
                 # Write full markdown content to log file
-                log_file.write(f"\n    Full Markdown Content for Table {idx + 1}:\n")
-                log_file.write(f"    {'='*60}\n")
-                log_file.write(markdown_content)
-                log_file.write(f"\n    {'='*60}\n")
+                log_file.write(f"\n    Full Markdown Content for Table {idx + 1}:\n    {'='*60}\n{markdown_content}\n    {'='*60}\n")
                 log_file.flush()
             
             if markdown_tables:
@@ -503,9 +634,7 @@ try:
                             writer.writerow([])  # Empty row after title
                         
                         # Write rows to CSV (with LaTeX cleaning)
-                        for row in rows:
-                            cleaned_row = clean_row(row)
-                            writer.writerow(cleaned_row)
+                        writer.writerows(clean_row(row) for row in rows)
                         
                         # Add spacing between tables if multiple tables on same page
                         if table_idx < len(markdown_tables) - 1:
@@ -519,13 +648,17 @@ try:
             
             pages_processed += 1
             
-        except Exception as page_error:
+        except (MistralError, httpx.HTTPError, RuntimeError) as page_error:
+            # API errors (including network errors left after retries) only skip this page
             print(f"Error processing page {page_num}: {page_error}")
             # Add error marker to CSV
             writer.writerow([])
             writer.writerow([f"Page {page_num} - ERROR: {str(page_error)}"])
             writer.writerow([])
             continue
+        finally:
+            if page_count % csv_flush_every == 0:
+                csvfile.flush()
     
     # Close CSV file
     csvfile.close()
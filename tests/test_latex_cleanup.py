@@ -0,0 +1,32 @@
+import importlib.util
+from pathlib import Path
+
+# test/test_single.py is a script, not a package module, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    "test_single", Path(__file__).resolve().parent.parent / "test" / "test_single.py"
+)
+test_single = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(test_single)
+
+def test_argument_command_after_bare_command_keeps_argument():
+    # \alpha is dropped as a bare command and \textbf{x:} keeps its argument;
+    # the old regex passes produced ':'
+    assert test_single.strip_latex_commands("\\alpha\\textbf{x:}") == "x:"
+
+def test_nested_commands_keep_innermost_argument():
+    assert test_single.strip_latex_commands("\\textbf{\\alpha{3}}") == "3"
+
+def test_unbalanced_argument_keeps_inner_brace():
+    assert test_single.strip_latex_commands("\\a{x\\b{y}") == "x{y"
+
+def test_escaped_brace_inside_argument():
+    assert test_single.strip_latex_commands("\\textbf{: {>3 1\\}b") == ": {>3 1\\b"
+    assert test_single.clean_latex_math("\\textbf{: {>3 1\\}b") == ": {>31\\b"
+
+def test_trailing_backslash_is_literal():
+    assert test_single.strip_latex_commands("\\") == "\\"
+    assert test_single.clean_latex_math("\\") == "\\"
+
+def test_double_backslash_is_unchanged():
+    assert test_single.strip_latex_commands("\\\\") == "\\\\"
+    assert test_single.clean_latex_math("\\\\") == "\\\\"
@@ -0,0 +1,34 @@
+import pikepdf
+
+import pdf_utils
+
+# A 1x1 grayscale inline image
+INLINE_IMAGE = b"q 10 0 0 10 0 0 cm BI /W 1 /H 1 /BPC 8 /CS /G ID \x00 EI Q"
+TEXT = b"BT /F1 12 Tf 72 72 Td (x) Tj ET"
+
+def make_page(content):
+    """Build a one-page PDF whose page draws the given content stream"""
+    pdf = pikepdf.new()
+    pdf.add_blank_page()
+    pdf.pages[0].Contents = pdf.make_stream(content)
+    return pdf
+
+def test_blank_page_has_no_content():
+    assert not pdf_utils.page_has_content(make_page(b""), 0)
+
+def test_text_page_has_content():
+    assert pdf_utils.page_has_content(make_page(TEXT), 0)
+
+def test_inline_image_page_has_content():
+    assert pdf_utils.page_has_content(make_page(INLINE_IMAGE), 0)
+
+def test_inline_image_followed_by_text_has_content():
+    pdf = make_page(INLINE_IMAGE + b"\n" + TEXT)
+    assert pdf_utils.page_has_content(pdf, 0)
+    operators = [str(instruction.operator) for instruction in
+                 pikepdf.parse_content_stream(pdf.pages[0], pdf_utils._CONTENT_OPERATORS)]
+    assert operators == ['INLINE IMAGE', 'Tj']
+
+def test_extract_page_bytes_is_deterministic():
+    pdf = make_page(TEXT)
+    assert pdf_utils.extract_page_bytes(pdf, 0) == pdf_utils.extract_page_bytes(pdf, 0)
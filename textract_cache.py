@@ -0,0 +1,59 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Settings are read on each call so values loaded from .env by the caller apply
+def get_cache_dir():
+    """Get the cache folder (TEXTRACT_CACHE_DIR, default .textract_cache)"""
+    return os.getenv("TEXTRACT_CACHE_DIR", ".textract_cache")
+
+def get_cache_ttl():
+    """Get the maximum age of a cached response in seconds (0 means never expire)"""
+    return float(os.getenv("TEXTRACT_CACHE_TTL", "0"))
+
+def make_key(pdf_bytes, feature_types):
+    """
+    Build a cache key from the document bytes and the requested Textract features.
+    Format: sha256 hex digest of {pdf_bytes}|{FEATURE,...}
+    """
+    digest = hashlib.sha256(pdf_bytes)
+    digest.update(b'|' + ','.join(feature_types).encode('utf-8'))
+    return digest.hexdigest()
+
+def get_cache_path(key):
+    """Get the on-disk path of a cached response"""
+    return os.path.join(get_cache_dir(), f"{key}.json.gz")
+
+def get(key):
+    """
+    Load a cached Textract response.
+    Returns None if the response is not cached, has expired or cannot be read.
+    """
+    cache_path = get_cache_path(key)
+    if not os.path.exists(cache_path):
+        return None
+
+    cache_ttl = get_cache_ttl()
+    if cache_ttl and time.time() - os.path.getmtime(cache_path) > cache_ttl:
+        return None
+
+    try:
+        with gzip.open(cache_path, 'rt', encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+def put(key, response):
+    """
+    Store a Textract response in the cache.
+    Writes to a temporary file first so a crash never leaves a partial entry.
+    """
+    os.makedirs(get_cache_dir(), exist_ok=True)
+    cache_path = get_cache_path(key)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as cache_file:
+        json.dump(response, cache_file, default=str)
+    os.replace(tmp_path, cache_path)